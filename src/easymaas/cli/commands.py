@@ -1,28 +1,65 @@
 import click
-import uvicorn
 import os
 import sys
 import ast
 import time
-import psutil
+import hashlib
+import pickle
 from pathlib import Path
 from typing import Tuple, List, Dict, Any
-from ..core.decorators import ServiceRegistry
+from .. import __version__
+from ..core.decorators import get_service, list_services as registry_list_services
 from ..core.config import DeploymentManager, DeploymentInfo, ServiceInfo
 
+def _load_cached_ast(path: Path, data: bytes) -> ast.AST:
+    """
+    解析Python源码，使用磁盘缓存避免重复解析
+
+    缓存键由源文件内容、Python版本和EasyMaaS版本共同决定，
+    源文件变更后自动失效。缓存损坏时回退到重新解析。
+    """
+    key = hashlib.sha256(data)
+    key.update(f"{sys.version_info[:2]}-{__version__}".encode())
+    cache_dir = Path(".easymaas") / "ast-cache"
+    cache_file = cache_dir / f"{path.stem}-{key.hexdigest()[:16]}.pkl"
+
+    if cache_file.exists():
+        try:
+            with open(cache_file, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            # 如果缓存损坏，删除它并重新解析
+            cache_file.unlink(missing_ok=True)
+
+    tree = ast.parse(data)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(cache_file, "wb") as f:
+            pickle.dump(tree, f, pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        # 缓存写入失败不影响解析结果
+        pass
+    return tree
+
 def find_decorated_services(directory: Path) -> Dict[str, Dict[str, str]]:
     """查找指定目录下所有被@service装饰的函数"""
     services = {}
-    for file in directory.glob("*.py"):
-        if file.name == "__init__.py":
-            continue
-            
+    # os.scandir加字符串后缀判断比Path.glob更快（无需构造fnmatch正则）
+    with os.scandir(directory) as it:
+        entries = [e for e in it
+                   if e.is_file() and e.name.endswith(".py") and e.name != "__init__.py"]
+    for entry in entries:
+        file = Path(entry.path)
         try:
-            with open(file, "r", encoding="utf-8") as f:
-                tree = ast.parse(f.read())
-            
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
+            data = file.read_bytes()
+            # 子串预过滤比ast.parse便宜得多，不含@service的文件直接跳过
+            if b"@service" not in data:
+                continue
+            tree = _load_cached_ast(file, data)
+
+            # @service只会出现在模块顶层的函数定义上，无需遍历整棵树
+            for node in tree.body:
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
                     for decorator in node.decorator_list:
                         if isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Name):
                             if decorator.func.id == "service":
@@ -39,13 +76,31 @@ def find_decorated_services(directory: Path) -> Dict[str, Dict[str, str]]:
     
     return services
 
+def _precompile_services(services_path: Path):
+    """
+    预编译服务目录，填充__pycache__使后续导入跳过解析
+
+    通过.easymaas下的marker文件记录上次预编译时间，服务目录
+    未变化时直接跳过compileall的目录遍历。
+    """
+    easymaas_dir = Path(".easymaas")
+    easymaas_dir.mkdir(exist_ok=True)
+    dir_hash = hashlib.blake2b(str(services_path.absolute()).encode("utf-8"), digest_size=6).hexdigest()
+    marker = easymaas_dir / f"precompiled_{dir_hash}.marker"
+    if marker.exists() and marker.stat().st_mtime >= services_path.stat().st_mtime:
+        return
+
+    import compileall
+    compileall.compile_dir(str(services_path), quiet=1, force=False)
+    marker.touch()
+
 def load_services(services_dir: str) -> Tuple[bool, List[str]]:
     """
     加载并注册服务
-    
+
     Args:
         services_dir: 服务目录路径
-    
+
     Returns:
         (是否成功, 已注册的服务列表)
     """
@@ -53,21 +108,26 @@ def load_services(services_dir: str) -> Tuple[bool, List[str]]:
     if not services_path.exists():
         click.echo(f"Services directory {services_dir} not found.", err=True)
         return False, []
-    
+
+    # 预热字节码缓存，使导入跳过解析步骤
+    _precompile_services(services_path)
+
     # 将services目录添加到Python路径
     sys.path.insert(0, str(services_path.parent))
     
     # 导入所有服务
-    for file in services_path.glob("*.py"):
-        if file.name != "__init__.py":
-            module_name = f"{services_path.name}.{file.stem}"
+    with os.scandir(services_path) as it:
+        for entry in it:
+            if not entry.is_file() or not entry.name.endswith(".py") or entry.name == "__init__.py":
+                continue
+            module_name = f"{services_path.name}.{entry.name[:-3]}"
             try:
                 __import__(module_name)
             except Exception as e:
                 click.echo(f"Error importing {module_name}: {e}", err=True)
     
     # 获取已注册的服务
-    services = ServiceRegistry.list_services()
+    services = registry_list_services()
     if not services:
         click.echo("No services found. Please create services in the services directory.")
         return False, []
@@ -80,10 +140,15 @@ def display_services(services: List[str]):
     for service in services:
         click.echo(f"  - {service}")
 
+def _configure_logging():
+    """配置日志（仅CLI入口调用，避免库导入时的副作用）"""
+    import logging
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
 @click.group()
 def cli():
     """EasyMaaS - A lightweight framework for wrapping Python code as OpenAI-compatible services"""
-    pass
+    _configure_logging()
 
 @cli.command()
 def init():
@@ -125,10 +190,16 @@ def start(host: str, port: int, reload: bool, services_dir: str):
     deployment_manager = DeploymentManager()
     deployment_manager.cleanup_dead_deployments()
     
-    # 检查端口是否被占用
-    for deployment in deployment_manager.list_deployments():
-        if deployment.port == port:
-            click.echo(f"Port {port} is already in use by another deployment.", err=True)
+    # 检查端口是否被占用：直接尝试绑定，一个系统调用即可，
+    # 无需读取并解析所有部署文件
+    import socket
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        # 与uvicorn监听socket的语义保持一致，避免TIME_WAIT残留导致误报端口占用
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            s.bind((host, port))
+        except OSError:
+            click.echo(f"Port {port} is already in use.", err=True)
             sys.exit(1)
     
     success, services = load_services(services_dir)
@@ -152,7 +223,7 @@ def start(host: str, port: int, reload: bool, services_dir: str):
         services=[
             ServiceInfo(
                 model_name=model_name,
-                function_name=ServiceRegistry.get_service(model_name).__name__,
+                function_name=get_service(model_name).__name__,
                 file_path=str(Path(services_dir) / f"{model_name}.py")
             )
             for model_name in services
@@ -164,6 +235,7 @@ def start(host: str, port: int, reload: bool, services_dir: str):
     
     # 启动服务器
     click.echo(f"Starting server on {host}:{port}")
+    import uvicorn  # 延迟导入，避免其他命令承担uvicorn的导入开销
     try:
         uvicorn.run(
             "easymaas.server.app:app",
@@ -189,33 +261,27 @@ def list_services(services_dir: str):
 def status():
     """查看当前部署的服务状态"""
     deployment_manager = DeploymentManager()
-    deployment_manager.cleanup_dead_deployments()
-    
-    deployments = deployment_manager.list_deployments()
+    # 清理与列出在同一次扫描中完成，返回的都是存活的部署
+    deployments = deployment_manager.cleanup_dead_deployments()
     if not deployments:
         click.echo("No active deployments found.")
         return
-    
+
     click.echo("Active deployments:")
     for deployment in deployments:
-        try:
-            process = psutil.Process(deployment.pid)
-            uptime = time.time() - deployment.start_time
-            hours = int(uptime // 3600)
-            minutes = int((uptime % 3600) // 60)
-            seconds = int(uptime % 60)
-            
-            click.echo(f"\nDeployment: {deployment.services_dir}")
-            click.echo(f"  Host: {deployment.host}")
-            click.echo(f"  Port: {deployment.port}")
-            click.echo(f"  PID: {deployment.pid}")
-            click.echo(f"  Uptime: {hours:02d}:{minutes:02d}:{seconds:02d}")
-            click.echo(f"  Services:")
-            for service in deployment.services:
-                click.echo(f"    - {service.model_name} ({service.function_name})")
-        except psutil.NoSuchProcess:
-            click.echo(f"\nDeployment: {deployment.services_dir} (DEAD)")
-            deployment_manager.delete_deployment(deployment.services_dir)
+        uptime = time.time() - deployment.start_time
+        hours = int(uptime // 3600)
+        minutes = int((uptime % 3600) // 60)
+        seconds = int(uptime % 60)
+
+        click.echo(f"\nDeployment: {deployment.services_dir}")
+        click.echo(f"  Host: {deployment.host}")
+        click.echo(f"  Port: {deployment.port}")
+        click.echo(f"  PID: {deployment.pid}")
+        click.echo(f"  Uptime: {hours:02d}:{minutes:02d}:{seconds:02d}")
+        click.echo(f"  Services:")
+        for service in deployment.services:
+            click.echo(f"    - {service.model_name} ({service.function_name})")
 
 if __name__ == "__main__":
     cli() 
\ No newline at end of file
@@ -2,64 +2,59 @@
 EasyMaaS 响应模板配置
 提供标准的OpenAI兼容响应模板
 """
-import uuid
+import secrets
 import time
 from typing import Dict, Any, List
 
+# 静态骨架只在模块导入时构造一次，每次调用仅复制可变的部分
+_DEFAULT_MESSAGE = {"role": "assistant", "content": "Hello from EasyMaaS"}
+_DEFAULT_USAGE = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+_STREAM_DELTA = {"role": "assistant", "content": ""}
+
 def get_default_response(model_name: str = "EasyMaaS") -> Dict[str, Any]:
     """
     获取默认的响应模板
-    
+
     Args:
         model_name: 模型名称
-        
+
     Returns:
         Dict[str, Any]: 默认响应对象
     """
     return {
-        "id": str(uuid.uuid4()),
+        "id": secrets.token_hex(16),
         "object": "chat.completion",
-        "created": int(time.time()),
+        "created": time.time_ns() // 1_000_000_000,
         "model": model_name,
         "choices": [
             {
                 "index": 0,
-                "message": {
-                    "role": "assistant",
-                    "content": "Hello from EasyMaaS"
-                },
+                "message": dict(_DEFAULT_MESSAGE),
                 "finish_reason": "stop"
             }
         ],
-        "usage": {
-            "prompt_tokens": 0,
-            "completion_tokens": 0,
-            "total_tokens": 0
-        }
+        "usage": dict(_DEFAULT_USAGE)
     }
 
 def get_stream_response(model_name: str = "EasyMaaS") -> Dict[str, Any]:
     """
     获取流式响应的模板
-    
+
     Args:
         model_name: 模型名称
-        
+
     Returns:
         Dict[str, Any]: 流式响应对象
     """
     return {
-        "id": str(uuid.uuid4()),
+        "id": secrets.token_hex(16),
         "object": "chat.completion.chunk",
-        "created": int(time.time()),
+        "created": time.time_ns() // 1_000_000_000,
         "model": model_name,
         "choices": [
             {
                 "index": 0,
-                "delta": {
-                    "role": "assistant",
-                    "content": ""
-                },
+                "delta": dict(_STREAM_DELTA),
                 "finish_reason": None
             }
         ]
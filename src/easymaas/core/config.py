@@ -1,19 +1,20 @@
 from typing import List, Dict, Optional
-from pydantic import BaseModel
+from dataclasses import dataclass, asdict
 from pathlib import Path
-import yaml
+import json
 import os
 import time
-import psutil
 import hashlib  # 添加 hashlib 模块
 
-class ServiceInfo(BaseModel):
+@dataclass(slots=True)
+class ServiceInfo:
     """服务信息"""
     model_name: str
     function_name: str
     file_path: str
 
-class DeploymentInfo(BaseModel):
+@dataclass(slots=True)
+class DeploymentInfo:
     """部署信息"""
     services_dir: str
     host: str
@@ -22,6 +23,11 @@ class DeploymentInfo(BaseModel):
     start_time: float
     services: List[ServiceInfo]
 
+def _deployment_from_dict(data: Dict) -> DeploymentInfo:
+    """从yaml反序列化的字典重建DeploymentInfo"""
+    services = [ServiceInfo(**s) for s in data.pop("services", [])]
+    return DeploymentInfo(services=services, **data)
+
 class DeploymentManager:
     """部署管理器"""
     def __init__(self):
@@ -31,16 +37,17 @@ class DeploymentManager:
     
     def get_deployment_file(self, services_dir: str) -> Path:
         """获取部署信息文件路径"""
-        # 使用服务目录的绝对路径的MD5哈希作为文件名，确保跨会话一致性
+        # 使用服务目录绝对路径的blake2b哈希作为文件名，确保跨会话一致性
+        # blake2b比md5更快，6字节摘要足够区分不同目录
         abs_path = str(Path(services_dir).absolute())
-        dir_hash = hashlib.md5(abs_path.encode()).hexdigest()[:10]  # 取前10位足够区分
-        return self.easymaas_dir / f"deployment_{dir_hash}.yaml"
+        dir_hash = hashlib.blake2b(abs_path.encode("utf-8"), digest_size=6).hexdigest()
+        return self.easymaas_dir / f"deployment_{dir_hash}.json"
     
     def save_deployment(self, info: DeploymentInfo):
         """保存部署信息"""
         deployment_file = self.get_deployment_file(info.services_dir)
         with open(deployment_file, "w", encoding="utf-8") as f:
-            yaml.dump(info.model_dump(), f)
+            json.dump(asdict(info), f)
     
     def load_deployment(self, services_dir: str) -> Optional[DeploymentInfo]:
         """加载部署信息"""
@@ -49,8 +56,8 @@ class DeploymentManager:
             return None
         
         with open(deployment_file, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
-            return DeploymentInfo(**data)
+            data = json.load(f)
+            return _deployment_from_dict(data)
     
     def delete_deployment(self, services_dir: str):
         """删除部署信息"""
@@ -61,22 +68,47 @@ class DeploymentManager:
     def list_deployments(self) -> List[DeploymentInfo]:
         """列出所有部署信息"""
         deployments = []
-        for file in self.easymaas_dir.glob("deployment_*.yaml"):
+        # os.scandir加字符串前后缀判断比Path.glob更快
+        with os.scandir(self.easymaas_dir) as it:
+            files = [Path(e.path) for e in it
+                     if e.is_file() and e.name.startswith("deployment_")
+                     and (e.name.endswith(".json") or e.name.endswith(".yaml"))]
+        for file in files:
             try:
-                with open(file, "r", encoding="utf-8") as f:
-                    data = yaml.safe_load(f)
-                    deployments.append(DeploymentInfo(**data))
+                if file.suffix == ".yaml":
+                    # 旧版yaml格式，一次性迁移为json
+                    info = self._migrate_yaml_deployment(file)
+                else:
+                    with open(file, "r", encoding="utf-8") as f:
+                        info = _deployment_from_dict(json.load(f))
+                deployments.append(info)
             except Exception:
                 # 如果文件损坏，删除它
                 file.unlink()
         return deployments
+
+    def _migrate_yaml_deployment(self, file: Path) -> DeploymentInfo:
+        """将旧版yaml部署文件迁移为json格式"""
+        import yaml
+        with open(file, "r", encoding="utf-8") as f:
+            info = _deployment_from_dict(yaml.safe_load(f))
+        self.save_deployment(info)
+        file.unlink()
+        return info
     
-    def cleanup_dead_deployments(self):
-        """清理已停止的部署"""
+    def _scan_and_prune(self) -> List[DeploymentInfo]:
+        """单次扫描部署文件，原地删除已停止的部署并返回存活的部署"""
+        import psutil
+        # 一次性快照所有存活pid，避免每个部署各查一次进程状态
+        alive = set(psutil.pids())
+        survivors = []
         for deployment in self.list_deployments():
-            try:
-                process = psutil.Process(deployment.pid)
-                if not process.is_running():
-                    self.delete_deployment(deployment.services_dir)
-            except psutil.NoSuchProcess:
-                self.delete_deployment(deployment.services_dir)
\ No newline at end of file
+            if deployment.pid in alive:
+                survivors.append(deployment)
+            else:
+                self.delete_deployment(deployment.services_dir)
+        return survivors
+
+    def cleanup_dead_deployments(self) -> List[DeploymentInfo]:
+        """清理已停止的部署，返回仍然存活的部署"""
+        return self._scan_and_prune()
\ No newline at end of file
@@ -1,45 +1,137 @@
 import functools
 import inspect
-import uuid
+import secrets
+import time
 import logging
 import json
+from collections import deque
+
+# orjson为可选依赖：C实现的JSON序列化直接产出bytes，对高频流式输出收益明显
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from typing import Callable, Any, Dict, List, Optional, Union, Set, Type, Tuple
 from fastapi.responses import StreamingResponse
 
 # 导入响应模板
-from ..config.templates import get_default_response, get_stream_response
+from ..config.templates import get_default_response
 
-# 配置日志
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# 日志配置由CLI入口负责（见commands.py），避免导入库时改写全局logging配置
 logger = logging.getLogger("EasyMaaS")
+_BAR = "=" * 80  # 日志分隔条，预先构造避免每条日志重复计算
 
-class ServiceRegistry:
-    _instance = None
-    _services: Dict[str, Callable] = {}
-    _service_configs: Dict[str, Dict[str, Any]] = {}  # 存储服务配置
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
-
-    @classmethod
-    def register(cls, model_name: str, func: Callable, map_request: bool = False, map_response: bool = False, supports_streaming: bool = False):
-        # 存储服务配置
-        cls._service_configs[model_name] = {
-            "map_request": map_request,
-            "map_response": map_response,
-            "supports_streaming": supports_streaming
-        }
-    
-        # 创建包装函数
+# 注册表状态是全局的，直接用模块级字典，省掉单例与classmethod分发开销
+_services: Dict[str, Callable] = {}
+_service_configs: Dict[str, Dict[str, Any]] = {}  # 存储服务配置
+
+def _make_batch_submitter(func: Callable, is_coro: bool, batch_size: int, batch_window_ms: float) -> Callable:
+    """
+    为支持批量执行的函数创建请求合并器
+
+    请求被放入队列并等待结果；后台任务攒够batch_size个请求或等满
+    batch_window_ms后，以列表形式一次性调用func，再把结果逐个分发
+    回对应请求。队列和后台任务在首个请求到来时在当前事件循环内
+    惰性创建。
+    """
+    import asyncio
+
+    state = {"queue": None, "task": None}
+    window = batch_window_ms / 1000.0
+
+    async def _worker(queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + window
+            while len(batch) < batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            requests = [request_data for request_data, _ in batch]
+            try:
+                results = await func(requests) if is_coro else func(requests)
+                if not isinstance(results, (list, tuple)) or len(results) != len(batch):
+                    raise ValueError(
+                        f"Batched function '{func.__name__}' must return a list with one result per request"
+                    )
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                logger.error("\n%s\n❌ Error: Batched function '%s' execution failed: %s\n%s", _BAR, func.__name__, e, _BAR)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def submit(request_data):
+        if state["queue"] is None:
+            state["queue"] = asyncio.Queue()
+            state["task"] = asyncio.get_running_loop().create_task(_worker(state["queue"]))
+        future = asyncio.get_running_loop().create_future()
+        await state["queue"].put((request_data, future))
+        return await future
+
+    return submit
+
+def register(model_name: str, func: Callable, map_request: bool = False, map_response: bool = False, supports_streaming: bool = False,
+             batch_size: Optional[int] = None, batch_window_ms: float = 10.0):
+    """注册服务，生成并存储包装函数"""
+    # 存储服务配置
+    _service_configs[model_name] = {
+        "map_request": map_request,
+        "map_response": map_response,
+        "supports_streaming": supports_streaming,
+        "batch_size": batch_size,
+        "batch_window_ms": batch_window_ms
+    }
+
+    # 注册时只做一次签名反射，请求路径直接复用结果
+    sig = inspect.signature(func)
+    param_names = tuple(sig.parameters)
+    is_coro = inspect.iscoroutinefunction(func)
+    param_plan = _build_param_plan(param_names) if map_request else None
+    # 批量模式：请求经合并器排队，func收到的是请求列表
+    submit = _make_batch_submitter(func, is_coro, batch_size, batch_window_ms) if batch_size else None
+
+    # 配置在注册期已经确定，按配置特化调用路径，请求路径上不再有配置分支
+    if submit is not None:
+        # 批量模式：整个请求是合并单位
+        invoke = submit
+    elif map_request:
+        if is_coro:
+            async def invoke(request_data):
+                return await func(**_map_request_to_params(func, request_data, param_plan))
+        else:
+            async def invoke(request_data):
+                return func(**_map_request_to_params(func, request_data, param_plan))
+    else:
+        if not param_names:
+            error_msg = f"\n{_BAR}\n❌ Error: Function '{func.__name__}' must have at least one parameter to receive the request\n{_BAR}"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+
+        # 使用第一个参数名作为键
+        first_param_name = param_names[0]
+        if is_coro:
+            async def invoke(request_data):
+                return await func(**{first_param_name: request_data})
+        else:
+            async def invoke(request_data):
+                return func(**{first_param_name: request_data})
+
+    if map_response:
         @functools.wraps(func)
         async def wrapper(request_data):
             # 检查是否请求流式输出但函数不支持
             stream = request_data.get("stream", False)
-            if stream and not supports_streaming and map_response:
-                error_msg = f"\n{'='*80}\n⚠️ Warning: Model '{model_name}' does not support streaming responses\n{'='*80}"
-                logger.warning(error_msg)
+            if stream and not supports_streaming:
+                logger.warning("\n%s\n⚠️ Warning: Model '%s' does not support streaming responses\n%s", _BAR, model_name, _BAR)
                 return {
                     "error": {
                         "message": f"Model '{model_name}' does not support streaming responses",
@@ -48,133 +140,174 @@ class ServiceRegistry:
                         "code": "streaming_not_supported"
                     }
                 }
-            
-            # 根据配置决定是否映射请求
-            if map_request:
-                # 映射请求参数到函数参数
-                params = _map_request_to_params(func, request_data)
-            else:
-                # 获取函数的第一个参数名
-                sig = inspect.signature(func)
-                param_names = list(sig.parameters.keys())
-                
-                if not param_names:
-                    error_msg = f"\n{'='*80}\n❌ Error: Function '{func.__name__}' must have at least one parameter to receive the request\n{'='*80}"
-                    logger.error(error_msg)
-                    raise ValueError(error_msg)
-                    
-                # 使用第一个参数名作为键
-                first_param_name = param_names[0]
-                params = {first_param_name: request_data}
-            
-            # 调用原始函数
+
             try:
-                result = await func(**params) if inspect.iscoroutinefunction(func) else func(**params)
-            
-                # 根据配置决定是否映射响应
-                if map_response:
-                    # 处理响应
-                    model_name = request_data.get("model", "EasyMaaS")
-                    stream = request_data.get("stream", False)
-                    if stream and supports_streaming:
-                        # 处理流式响应
-                        return await _create_stream_response(func, request_data, result, model_name)
-                    return _create_response(func, request_data, result, model_name)
-                else:
-                    # 直接返回原始结果
-                    return result
+                result = await invoke(request_data)
+                req_model = request_data.get("model", "EasyMaaS")
+                # 前面已拦截不支持流式的情况，此处stream为真即可流式返回
+                if stream:
+                    return await _create_stream_response(func, request_data, result, req_model)
+                return _create_response(func, request_data, result, req_model)
             except Exception as e:
-                error_msg = f"\n{'='*80}\n❌ Error: Function '{func.__name__}' execution failed: {str(e)}\n{'='*80}"
-                logger.error(error_msg)
+                logger.error("\n%s\n❌ Error: Function '%s' execution failed: %s\n%s", _BAR, func.__name__, e, _BAR)
+                raise
+    else:
+        @functools.wraps(func)
+        async def wrapper(request_data):
+            try:
+                # 不映射响应时直接返回原始结果
+                return await invoke(request_data)
+            except Exception as e:
+                logger.error("\n%s\n❌ Error: Function '%s' execution failed: %s\n%s", _BAR, func.__name__, e, _BAR)
                 raise
-        
-        # 存储包装后的函数
-        cls._services[model_name] = wrapper
 
-    @classmethod
-    def get_service(cls, model_name: str) -> Optional[Callable]:
-        return cls._services.get(model_name)
+    # 存储包装后的函数
+    _services[model_name] = wrapper
 
-    @classmethod
-    def get_service_config(cls, model_name: str) -> Dict[str, Any]:
-        return cls._service_configs.get(model_name, {})
+def get_service(model_name: str) -> Optional[Callable]:
+    """获取已注册的服务"""
+    return _services.get(model_name)
 
-    @classmethod
-    def list_services(cls) -> List[str]:
-        return list(cls._services.keys())
+def get_service_config(model_name: str) -> Dict[str, Any]:
+    """获取服务配置"""
+    return _service_configs.get(model_name, {})
 
-def service(model_name: str, description: str = "", map_request: bool = False, map_response: bool = False, supports_streaming: bool = False):
+def list_services() -> List[str]:
+    """列出已注册的服务名"""
+    return list(_services)
+
+def service(model_name: str, description: str = "", map_request: bool = False, map_response: bool = False, supports_streaming: bool = False,
+            batch_size: Optional[int] = None, batch_window_ms: float = 10.0):
     """
     将函数装饰为OpenAI兼容的服务
-    
+
     Args:
         model_name: 模型名称
         description: 服务描述
         map_request: 是否将请求映射为OpenAI格式（默认为False）
         map_response: 是否将响应映射为OpenAI格式（默认为False）
         supports_streaming: 是否支持流式输出（默认为False）
+        batch_size: 批量执行时合并的最大请求数；设置后函数会收到
+            请求字典列表并需返回等长的结果列表，此时忽略map_request
+        batch_window_ms: 凑批的最长等待时间，单位毫秒（默认为10）
     """
     def decorator(func: Callable):
         # 注册服务
-        ServiceRegistry.register(model_name, func, map_request, map_response, supports_streaming)
+        register(model_name, func, map_request, map_response, supports_streaming,
+                 batch_size=batch_size, batch_window_ms=batch_window_ms)
         return func
     return decorator
 
 def _find_key_in_json(json_obj: Any, target_key: str) -> Tuple[bool, Any]:
     """
-    在JSON对象中递归查找指定的键
-    
+    在JSON对象中迭代查找指定的键
+
+    使用显式队列做广度优先遍历，避免每个节点一次函数调用的开销；
+    顶层命中时无需进入循环体之外的任何遍历。
+
     Args:
         json_obj: JSON对象
         target_key: 目标键名
-        
+
     Returns:
         Tuple[bool, Any]: (是否找到, 对应的值)
     """
-    # 如果是字典，直接检查键
-    if isinstance(json_obj, dict):
-        # 直接匹配
-        if target_key in json_obj:
-            return True, json_obj[target_key]
-        
-        # 递归检查每个值
-        for key, value in json_obj.items():
-            found, result = _find_key_in_json(value, target_key)
-            if found:
-                return True, result
-    
-    # 如果是列表，检查最后一个元素（如果是字典）
-    elif isinstance(json_obj, list) and json_obj:
-        last_item = json_obj[-1]
-        # 只处理列表中的字典元素
-        if isinstance(last_item, dict):
-            return _find_key_in_json(last_item, target_key)
-    
+    # 最常见的情况：键就在顶层字典
+    # JSON解析只产出精确的dict/list，type()判断比isinstance少一次MRO查找
+    if type(json_obj) is dict and target_key in json_obj:
+        return True, json_obj[target_key]
+
+    queue = deque([json_obj])
+    while queue:
+        node = queue.popleft()
+        if type(node) is dict:
+            if target_key in node:
+                return True, node[target_key]
+            queue.extend(node.values())
+        # 列表只检查最后一个元素（如果是字典）
+        elif type(node) is list and node and type(node[-1]) is dict:
+            queue.append(node[-1])
+
     # 未找到
     return False, None
 
-def _map_request_to_params(func: Callable, request_data: Dict[str, Any]) -> Dict[str, Any]:
+# OpenAI请求格式的静态结构：顶层字段与消息字段，用于注册时编译参数提取计划
+_REQUEST_FIELDS = frozenset({
+    "model", "messages", "temperature", "top_p", "n", "stream", "stop",
+    "max_tokens", "presence_penalty", "frequency_penalty", "user",
+})
+_MESSAGE_FIELDS = frozenset({"role", "content", "name"})
+
+def _top_level_extractor(param_name: str) -> Callable[[Dict[str, Any]], Tuple[bool, Any]]:
+    """生成直接读取请求顶层字段的提取器，未命中时回退到递归查找"""
+    def extract(request_data):
+        if param_name in request_data:
+            return True, request_data[param_name]
+        return _find_key_in_json(request_data, param_name)
+    return extract
+
+def _message_extractor(param_name: str) -> Callable[[Dict[str, Any]], Tuple[bool, Any]]:
+    """生成读取最后一条消息字段的提取器，未命中时回退到递归查找"""
+    def extract(request_data):
+        messages = request_data.get("messages")
+        if messages:
+            last = messages[-1]
+            if isinstance(last, dict) and param_name in last:
+                return True, last[param_name]
+        return _find_key_in_json(request_data, param_name)
+    return extract
+
+def _fallback_extractor(param_name: str) -> Callable[[Dict[str, Any]], Tuple[bool, Any]]:
+    """生成通用递归查找的提取器"""
+    def extract(request_data):
+        return _find_key_in_json(request_data, param_name)
+    return extract
+
+def _build_param_plan(param_names: Tuple[str, ...]) -> List[Tuple[str, Callable[[Dict[str, Any]], Tuple[bool, Any]]]]:
     """
-    使用JSON递归映射请求参数到函数参数
-    
+    为函数参数编译提取计划
+
+    OpenAI请求的结构是固定的，因此每个参数在请求中的位置可以在
+    注册时确定一次，请求路径只需执行预编译的提取器，无需反射或
+    完整的树遍历。
+
+    Args:
+        param_names: 函数参数名
+
+    Returns:
+        List[Tuple[str, Callable]]: (参数名, 提取器)列表
+    """
+    plan = []
+    for name in param_names:
+        if name in _REQUEST_FIELDS:
+            extractor = _top_level_extractor(name)
+        elif name in _MESSAGE_FIELDS:
+            extractor = _message_extractor(name)
+        else:
+            extractor = _fallback_extractor(name)
+        plan.append((name, extractor))
+    return plan
+
+def _map_request_to_params(func: Callable, request_data: Dict[str, Any], param_plan: List[Tuple[str, Callable]]) -> Dict[str, Any]:
+    """
+    按预编译的提取计划将请求映射到函数参数
+
     Args:
         func: 要映射的函数
         request_data: 请求数据字典
-        
+        param_plan: 注册时编译的(参数名, 提取器)列表
+
     Returns:
         Dict[str, Any]: 映射后的参数字典
     """
-    # 获取函数参数
-    sig = inspect.signature(func)
     params = {}
-    
+
     # 记录未映射的参数
     unmapped_params = []
-    
+
     # 处理参数映射
-    for param_name, param in sig.parameters.items():
-        # 在请求JSON中查找参数
-        found, value = _find_key_in_json(request_data, param_name)
+    for param_name, extractor in param_plan:
+        found, value = extractor(request_data)
         if found:
             params[param_name] = value
         else:
@@ -184,41 +317,37 @@ def _map_request_to_params(func: Callable, request_data: Dict[str, Any]) -> Dict
     
     # 如果有未映射的参数，发出警告
     if unmapped_params:
-        warning_msg = f"\n{'='*80}\n⚠️ Warning: The following parameters of function '{func.__name__}' could not be mapped to the request and have been set to None: {', '.join(unmapped_params)}\n"
-        logger.warning(warning_msg)
+        logger.warning("\n%s\n⚠️ Warning: The following parameters of function '%s' could not be mapped to the request and have been set to None: %s\n", _BAR, func.__name__, ", ".join(unmapped_params))
     
     return params
 
 def _update_json_with_key(json_obj: Dict[str, Any], target_key: str, new_value: Any) -> bool:
     """
-    递归更新JSON对象中指定键的值
-    
+    迭代更新JSON对象中指定键的值
+
+    与_find_key_in_json相同的广度优先遍历，找到第一个匹配后原地
+    写入并立即返回。
+
     Args:
         json_obj: JSON对象
         target_key: 目标键名
         new_value: 新值
-        
+
     Returns:
         bool: 是否成功更新
     """
-    # 直接匹配
-    if target_key in json_obj:
-        json_obj[target_key] = new_value
-        return True
-    
-    # 递归检查每个值
-    for key, value in json_obj.items():
-        # 如果值是字典，递归处理
-        if isinstance(value, dict):
-            if _update_json_with_key(value, target_key, new_value):
+    queue = deque([json_obj])
+    while queue:
+        node = queue.popleft()
+        if type(node) is dict:
+            if target_key in node:
+                node[target_key] = new_value
                 return True
-        # 如果值是列表且元素为字典，处理最后一个元素
-        elif isinstance(value, list) and value:
-            last_item = value[-1]
-            if isinstance(last_item, dict):
-                if _update_json_with_key(last_item, target_key, new_value):
-                    return True
-    
+            queue.extend(node.values())
+        # 列表只检查最后一个元素（如果是字典）
+        elif type(node) is list and node and type(node[-1]) is dict:
+            queue.append(node[-1])
+
     # 未找到
     return False
 
@@ -240,41 +369,70 @@ def _create_response(func: Callable, request_data: Dict[str, Any], result: Any,
     
     # 计算提示tokens (如果需要)
     messages = request_data.get("messages", [])
-    prompt_tokens = sum(len(msg.get("content", "").split()) for msg in messages if isinstance(msg, dict))
+    prompt_tokens = sum(_count_tokens(msg.get("content", "")) for msg in messages if type(msg) is dict)
     response["usage"]["prompt_tokens"] = prompt_tokens
+    # 所有分支都保证token字段有值；str分支随后会补上completion部分
+    response["usage"]["total_tokens"] = prompt_tokens
     
     # 处理不同类型的返回值
     if result is None:
         # 如果返回值为None，使用默认响应
-        logger.warning(f"\n{'='*80}\n⚠️ Warning: Function '{func.__name__}' returned None, using default response 'Hello from EasyMaaS'\n{'='*80}")
+        logger.warning("\n%s\n⚠️ Warning: Function '%s' returned None, using default response 'Hello from EasyMaaS'\n%s", _BAR, func.__name__, _BAR)
         return response
     
-    elif isinstance(result, str):
+    elif type(result) is str:
         # 如果返回值为字符串，将其作为消息内容
         response["choices"][0]["message"]["content"] = result
         # 计算completion_tokens
-        response["usage"]["completion_tokens"] = len(result.split())
-        response["usage"]["total_tokens"] = response["usage"]["prompt_tokens"] + response["usage"]["completion_tokens"]
+        completion_tokens = _count_tokens(result)
+        response["usage"]["completion_tokens"] = completion_tokens
+        response["usage"]["total_tokens"] = prompt_tokens + completion_tokens
     
-    elif isinstance(result, list):
+    elif type(result) is list:
         # 不支持列表返回值
-        logger.warning(f"\n{'='*80}\n⚠️ Warning: Function '{func.__name__}' does not support list type return values, using default response 'Hello from EasyMaaS'\n{'='*80}")
+        logger.warning("\n%s\n⚠️ Warning: Function '%s' does not support list type return values, using default response 'Hello from EasyMaaS'\n%s", _BAR, func.__name__, _BAR)
         return response
     
-    elif isinstance(result, dict):
+    elif type(result) is dict:
         # 如果返回值为字典，进行递归映射
         for key, value in result.items():
             # 尝试更新响应JSON
             if not _update_json_with_key(response, key, value):
-                logger.warning(f"\n{'='*80}\n⚠️ Warning: Function '{func.__name__}' could not find a matching response key for return value {key}\n{'='*80}")
+                logger.warning("\n%s\n⚠️ Warning: Function '%s' could not find a matching response key for return value %s\n%s", _BAR, func.__name__, key, _BAR)
     
     else:
         # 其他类型，转换为字符串
-        logger.warning(f"\n{'='*80}\n⚠️ Warning: Function '{func.__name__}' has an unsupported return value type {type(result).__name__}, converting to string\n{'='*80}")
+        logger.warning("\n%s\n⚠️ Warning: Function '%s' has an unsupported return value type %s, converting to string\n%s", _BAR, func.__name__, type(result).__name__, _BAR)
         return _create_response(func, request_data, str(result), model_name)
     
     return response
 
+# SSE响应头不会变化，所有流共享同一个字典
+_SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "Content-Type": "text/event-stream",
+    "X-Accel-Buffering": "no"
+}
+
+def _count_tokens(s: str) -> int:
+    """粗略统计词数（空格分隔），避免split()分配临时列表"""
+    return 0 if not s else s.count(" ") + 1
+
+# SSE帧的前后缀只编码一次
+_DATA_PREFIX = b"data: "
+_SSE_END = b"\n\n"
+
+def _dump_sse_frame(chunk: Dict[str, Any]) -> bytes:
+    """将响应块序列化为一帧SSE数据（bytes）"""
+    buf = bytearray(_DATA_PREFIX)
+    if orjson is not None:
+        buf += orjson.dumps(chunk)
+    else:
+        buf += json.dumps(chunk).encode("utf-8")
+    buf += _SSE_END
+    return bytes(buf)
+
 async def _create_stream_response(func: Callable, request_data: Dict[str, Any], result: Any, model_name: str = "EasyMaaS"):
     """
     处理流式响应
@@ -288,83 +446,92 @@ async def _create_stream_response(func: Callable, request_data: Dict[str, Any],
     Returns:
         StreamingResponse: 流式响应对象
     """
-    # 创建响应ID（所有块共享同一个ID）
-    response_id = str(uuid.uuid4())
-    
+    # 创建响应ID和时间戳（所有块共享）
+    response_id = secrets.token_hex(16)
+    created = time.time_ns() // 1_000_000_000
+
+    # 生成器类型在流开始前判定一次，循环内部不再做任何检查
+    is_asyncgen = inspect.isasyncgen(result)
+    is_syncgen = not is_asyncgen and inspect.isgenerator(result)
+
     async def stream_generator():
-        # 处理不同类型的生成器
         try:
-            if inspect.isasyncgen(result):
+            if is_asyncgen:
                 # 异步生成器
                 async for chunk in result:
-                    processed_chunk = _process_stream_chunk(chunk, response_id, model_name)
-                    yield f"data: {json.dumps(processed_chunk)}\n\n"
-            elif inspect.isgenerator(result):
+                    processed_chunk = _process_stream_chunk(chunk, response_id, model_name, created)
+                    yield _dump_sse_frame(processed_chunk)
+            elif is_syncgen:
                 # 同步生成器
                 for chunk in result:
-                    processed_chunk = _process_stream_chunk(chunk, response_id, model_name)
-                    yield f"data: {json.dumps(processed_chunk)}\n\n"
+                    processed_chunk = _process_stream_chunk(chunk, response_id, model_name, created)
+                    yield _dump_sse_frame(processed_chunk)
             else:
                 # 不是生成器，作为单个块处理
-                logger.warning(f"\n{'='*80}\n⚠️ Warning: Function '{func.__name__}' is marked as supporting streaming but did not return a generator\n{'='*80}")
-                processed_chunk = _process_stream_chunk(result, response_id, model_name)
-                yield f"data: {json.dumps(processed_chunk)}\n\n"
+                logger.warning("\n%s\n⚠️ Warning: Function '%s' is marked as supporting streaming but did not return a generator\n%s", _BAR, func.__name__, _BAR)
+                processed_chunk = _process_stream_chunk(result, response_id, model_name, created)
+                yield _dump_sse_frame(processed_chunk)
 
         except Exception as e:
-            logger.error(f"\n{'='*80}\n❌ Error in stream processing: {str(e)}\n{'='*80}")
+            logger.error("\n%s\n❌ Error in stream processing: %s\n%s", _BAR, e, _BAR)
             # 发送错误信息
-            error_chunk = get_stream_response(model_name)
-            error_chunk["id"] = response_id
-            error_chunk["choices"][0]["delta"]["content"] = f"Error: {str(e)}"
+            error_chunk = _process_stream_chunk(f"Error: {str(e)}", response_id, model_name, created)
             error_chunk["choices"][0]["finish_reason"] = "error"
-            yield f"data: {json.dumps(error_chunk)}\n\n"
-    
+            yield _dump_sse_frame(error_chunk)
+
     return StreamingResponse(
         stream_generator(),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Content-Type": "text/event-stream",
-            "X-Accel-Buffering": "no"
-        }
+        headers=_SSE_HEADERS
     )
 
-def _process_stream_chunk(chunk: Any, response_id: str, model_name: str) -> Dict[str, Any]:
+def _process_stream_chunk(chunk: Any, response_id: str, model_name: str, created: int) -> Dict[str, Any]:
     """
     处理流式响应的单个块
-    
+
     Args:
         chunk: 块数据
         response_id: 响应ID
         model_name: 模型名称
-        
+        created: 响应创建时间戳（整个流共享）
+
     Returns:
         Dict[str, Any]: 处理后的块
     """
-    # 获取基本响应模板
-    response = get_stream_response(model_name)
-    response["id"] = response_id
+    # 直接构造响应块，避免每个块都走模板生成（模板会重新生成id和时间戳）
+    response = {
+        "id": response_id,
+        "object": "chat.completion.chunk",
+        "created": created,
+        "model": model_name,
+        "choices": [
+            {
+                "index": 0,
+                "delta": {"role": "assistant", "content": ""},
+                "finish_reason": None
+            }
+        ]
+    }
     
     # 处理不同类型的块
     if chunk is None:
         # 如果块为None，使用空内容
         return response
     
-    elif isinstance(chunk, str):
+    elif type(chunk) is str:
         # 如果块为字符串，将其作为消息内容
         response["choices"][0]["delta"]["content"] = chunk
     
-    elif isinstance(chunk, dict):
+    elif type(chunk) is dict:
         # 如果块为字典，进行递归映射
         for key, value in chunk.items():
             # 尝试更新响应JSON
             if not _update_json_with_key(response, key, value):
-                logger.warning(f"\n{'='*80}\n⚠️ Warning: Could not find a matching response key for stream chunk value {key}\n{'='*80}")
+                logger.warning("\n%s\n⚠️ Warning: Could not find a matching response key for stream chunk value %s\n%s", _BAR, key, _BAR)
     
     else:
         # 其他类型，转换为字符串
-        logger.warning(f"\n{'='*80}\n⚠️ Warning: Unsupported stream chunk type {type(chunk).__name__}, converting to string\n{'='*80}")
+        logger.warning("\n%s\n⚠️ Warning: Unsupported stream chunk type %s, converting to string\n%s", _BAR, type(chunk).__name__, _BAR)
         response["choices"][0]["delta"]["content"] = str(chunk)
     
     return response
@@ -1,5 +1,5 @@
 from typing import List, Optional, Union, Dict, Any
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field
 import time
 import uuid
 
@@ -32,25 +32,12 @@ class Usage(BaseModel):
     total_tokens: int = 0
 
 class ChatCompletionResponse(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     object: str = "chat.completion"
-    created: int = Field(default_factory=lambda: int(time.time()))
+    created: int = Field(default_factory=lambda: time.time_ns() // 1_000_000_000)
     model: str = "EasyMaaS"
     choices: List[Choice] = Field(default_factory=lambda: [Choice()])
     usage: Usage = Field(default_factory=Usage)
-    
-    @model_validator(mode="after")
-    def calculate_tokens(self):
-        """计算completion_tokens和total_tokens"""
-        # 如果已经设置了completion_tokens，则计算total_tokens
-        if self.usage.completion_tokens == 0 and self.choices and self.choices[0].message.content:
-            # 计算completion_tokens
-            self.usage.completion_tokens = len(self.choices[0].message.content.split())
-        
-            # 计算total_tokens
-            self.usage.total_tokens = self.usage.prompt_tokens + self.usage.completion_tokens
-            
-        return self
 
 class StreamChoice(BaseModel):
     index: int = 0
@@ -58,8 +45,8 @@ class StreamChoice(BaseModel):
     finish_reason: Optional[str] = None
 
 class StreamChatCompletionResponse(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     object: str = "chat.completion.chunk"
-    created: int = Field(default_factory=lambda: int(time.time()))
+    created: int = Field(default_factory=lambda: time.time_ns() // 1_000_000_000)
     model: str = "EasyMaaS"
     choices: List[StreamChoice] = Field(default_factory=lambda: [StreamChoice()])
\ No newline at end of file
@@ -1,13 +1,20 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
-import inspect
-from ..core.decorators import ServiceRegistry
+from ..core.decorators import get_service, list_services
+
+# orjson为可选依赖：安装后用C实现的ORJSONResponse渲染JSON响应
+try:
+    import orjson  # noqa: F401  ORJSONResponse渲染时需要orjson
+    from fastapi.responses import ORJSONResponse as _default_response_class
+except ImportError:
+    from fastapi.responses import JSONResponse as _default_response_class
 
 app = FastAPI(
     title="EasyMaaS",
     description="A lightweight framework for wrapping Python code as OpenAI-compatible services",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=_default_response_class
 )
 
 # 配置CORS
@@ -26,15 +33,15 @@ async def chat_completion(request: Request):
     request_data = await request.json()
     model_name = request_data.get("model", "")
     
-    service = ServiceRegistry.get_service(model_name)
+    service = get_service(model_name)
     if not service:
         raise HTTPException(
             status_code=404,
-            detail=f"Model {model_name} not found. Available models: {', '.join(ServiceRegistry.list_services())}"
+            detail=f"Model {model_name} not found. Available models: {', '.join(list_services())}"
         )
     
-    # 直接传递原始请求数据给服务
-    response = await service(request_data) if inspect.iscoroutinefunction(service) else service(request_data)
+    # 直接传递原始请求数据给服务（注册生成的包装函数始终是协程，无需逐请求检查）
+    response = await service(request_data)
     
     # 检查响应是否已经是StreamingResponse
     if isinstance(response, StreamingResponse):
@@ -55,6 +62,6 @@ async def list_models():
                 "created": 0,
                 "owned_by": "organization"
             }
-            for model_name in ServiceRegistry.list_services()
+            for model_name in list_services()
         ]
     }
\ No newline at end of file